@@ -1,10 +1,16 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
+import re
+import weakref
+from dataclasses import MISSING, dataclass, field, fields
+from functools import cached_property
 from typing import Any, Mapping, Protocol, runtime_checkable
-from .identity import hash_identity
+from .identity import canonicalize, hash_identity
 
 ARTIFACT_REGISTRY: dict[str, type[Artifact]] = {}
 
+# logically equal artifacts share one instance while anything still references it
+_INTERN: weakref.WeakValueDictionary[bytes, ArtifactBase] = weakref.WeakValueDictionary()
+
 def register_artifact(cls: type[Artifact]):
     ARTIFACT_REGISTRY[cls.__name__] = cls
     return cls
@@ -29,6 +35,99 @@ def artifact_from_dict(d: dict) -> Artifact:
             resolved[k] = v
     return cls(**resolved)
     
+class _FrozenDict(dict):
+    """
+    Read-only dict stored in mapping fields of artifacts. Interned instances are shared
+    and keyed on their construction values, so those values must not change afterwards.
+    Still a dict, so JSON encoders, ** unpacking and pickle handle it as before.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> Any:
+        raise TypeError("artifact parameters are read-only; build a new artifact instead")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        # the default dict-subclass pickling refills the instance through __setitem__
+        return (type(self), (dict(self),))
+
+
+def _freeze(v: Any) -> Any:
+    """Copy dict/list field values into read-only equivalents (dicts and lists at any depth)."""
+    if isinstance(v, dict):
+        return v if type(v) is _FrozenDict else _FrozenDict({k: _freeze(x) for k, x in v.items()})
+    if isinstance(v, list):
+        return tuple(_freeze(x) for x in v)
+    if type(v) is tuple:
+        return tuple(_freeze(x) for x in v)
+    return v
+
+
+def thaw(v: Any) -> Any:
+    """
+    Mutable deep copy of a (frozen) artifact field, for producers handing parameters to
+    code that may modify them (processors, coffea's metadata_cache, ...).
+    """
+    if isinstance(v, dict):
+        return {k: thaw(x) for k, x in v.items()}
+    if type(v) in (list, tuple):
+        return [thaw(x) for x in v]
+    return v
+
+
+def _intern_key(cls: type, values: Mapping[str, Any]) -> bytes:
+    """
+    NUL-separated `module.Class\0field=value\0...` key. Values are canonical JSON, which
+    never contains a raw NUL; nested artifacts are represented by their identity.
+    """
+    parts = [f"{cls.__module__}.{cls.__qualname__}".encode("utf-8")]
+    for k, v in sorted(values.items()):
+        enc = v.identity().encode("ascii") if isinstance(v, ArtifactBase) else canonicalize(v)
+        parts.append(k.encode("utf-8") + b"=" + enc)
+    return b"\0".join(parts)
+
+
+class _InternMeta(type):
+    """
+    Hash-conses artifact construction: `Fileset("TTbar", "2018")` returns the
+    same object every time, so equality and hashing reduce to object identity.
+    """
+
+    def __call__(cls, *args: Any, **kwargs: Any):
+        init_fields = [f for f in fields(cls) if f.init]
+        if len(args) > len(init_fields):
+            raise TypeError(f"{cls.__name__} takes {len(init_fields)} positional arguments but {len(args)} were given")
+
+        values: dict[str, Any] = dict(zip((f.name for f in init_fields), args))
+        for f in init_fields[len(args):]:
+            if f.name in kwargs:
+                values[f.name] = kwargs.pop(f.name)
+            elif f.default is not MISSING:
+                values[f.name] = f.default
+            elif f.default_factory is not MISSING:
+                values[f.name] = f.default_factory()
+        if kwargs:
+            # let the dataclass __init__ produce the usual error message
+            return super().__call__(**values, **kwargs)
+
+        # the key is computed from these values and the instance keeps them: copy them
+        # into read-only form so the caller's dicts can't change either afterwards
+        values = {k: _freeze(v) for k, v in values.items()}
+        try:
+            key = _intern_key(cls, values)
+        except TypeError:
+            # not JSON-like, so not internable (identity() will refuse it as well)
+            return super().__call__(**values)
+        inst = _INTERN.get(key)
+        if inst is None:
+            inst = super().__call__(**values)
+            _INTERN[key] = inst
+        return inst
+
+
 @runtime_checkable
 class Artifact(Protocol):
     def keys(self) -> Mapping[str, Any]: ...
@@ -37,24 +136,69 @@ class Artifact(Protocol):
     @property
     def type_name(self) -> str: ...
 
-@dataclass(frozen=True)
-class ArtifactBase:
+@dataclass(frozen=True, eq=False)
+class ArtifactBase(metaclass=_InternMeta):
+    def __post_init__(self) -> None:
+        # keys() is fixed once the instance exists: sort it once here, not on every identity computation
+        object.__setattr__(self, "_canon_key", tuple(sorted(self.keys().items())))
+
     def keys(self) -> Mapping[str, Any]:
         raise NotImplementedError
 
+    # Equality and hashing go through the cached identity, never a walk over (nested) fields.
+    # Constructed artifacts are interned (see _InternMeta), so the `is` check almost always
+    # decides; the identity comparison covers copies made without calling the class,
+    # e.g. unpickled artifacts.
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.identity() == other.identity()
+
+    def __hash__(self) -> int:
+        return hash(self.identity())
+
     @property
     def type_name(self) -> str:
         return type(self).__name__
 
     def identity(self) -> str:
-        return hash_identity(self.to_dict())
+        return self._identity
+
+    # Artifacts are frozen, so the canonical bytes and the identity are computed once and cached
+    # in the instance __dict__ (cached_property bypasses the frozen __setattr__).
+    @cached_property
+    def _canon_bytes(self) -> bytes:
+        """
+        Flat encoding fed to the identity hash: the type name followed by one `key=value`
+        part per key, values in canonical JSON. Canonical JSON never contains a raw NUL,
+        so NUL-joining the parts is unambiguous. Nested artifacts enter through their
+        (cached) identity, see keys().
+        """
+        parts = [self.type_name.encode("utf-8")]
+        for k, v in self._canon_key:
+            parts.append(k.encode("utf-8") + b"=" + canonicalize(v))
+        return b"\0".join(parts)
+
+    @cached_property
+    def _identity(self) -> str:
+        return hash_identity(self._canon_bytes)
 
     def to_dict(self) -> dict:
         return {"type": self.__class__.__name__, "keys": self.keys()}
 
+    def cache_group(self) -> str | None:
+        """
+        Optional directory level between the type directory and the identity in the cache
+        (see Executor.path_for), grouping artifacts that are looked up together.
+        Not part of the Artifact protocol: artifacts without it are stored ungrouped.
+        """
+        return None
+
 
 @register_artifact
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Fileset(ArtifactBase):
     dataset: str
     era: str
@@ -64,17 +208,27 @@ class Fileset(ArtifactBase):
 
 
 @register_artifact
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Chunking(ArtifactBase):
     fileset: Fileset
     n_parts: int
     strategy: str = "simple"  # think of strategies and how to reconcile them with n_parts
 
     def keys(self) -> Mapping[str, Any]:
-        return {"fileset": self.fileset.keys(), "n_parts": self.n_parts, "strategy": self.strategy}
+        return {"fileset": self.fileset.identity(), "n_parts": self.n_parts, "strategy": self.strategy}
+
+def chunk_analysis_group(dataset: str, era: str, tag: str | None) -> str:
+    """
+    Cache directory name shared by all ChunkAnalysis results of one (dataset, era, tag).
+    The readable part is lossy (separators and unsafe characters collapse to "_", None
+    reads as "None"), so a short hash of the exact tuple keeps distinct keys apart.
+    """
+    readable = re.sub(r"[^A-Za-z0-9._+-]", "_", f"{dataset}__{era}__{tag}")
+    return f"{readable}-{hash_identity([dataset, era, tag])[:16]}"
+
 
 @register_artifact
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class ChunkAnalysis(ArtifactBase):
     chunk: "Chunking"
     part: int
@@ -88,7 +242,7 @@ class ChunkAnalysis(ArtifactBase):
 
     def keys(self) -> Mapping[str, Any]:
         return {
-            "chunk": self.chunk.keys(),
+            "chunk": self.chunk.identity(),
             "part": self.part,
             "chunk_size": self.chunk_size,
             "tag": self.tag,
@@ -99,37 +253,26 @@ class ChunkAnalysis(ArtifactBase):
             "executor_params": self.executor_params,
         }
 
+    def cache_group(self) -> str | None:
+        fileset = self.chunk.fileset
+        return chunk_analysis_group(fileset.dataset, fileset.era, self.tag)
+
 
 @register_artifact
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class MergedResult(ArtifactBase):
     fileset: Fileset
     tag: str
 
     def keys(self) -> Mapping[str, Any]:
-        return {"fileset": self.fileset.keys(), "tag": self.tag}
-
-
-@register_artifact
-@dataclass(frozen=True)
-class Plots(ArtifactBase):
-    source: ArtifactBase
-    plotter: str
-    plotter_params: Dict[str, Any] = field(default_factory=dict)
-
-    def keys(self) -> Mapping[str, Any]:
-        return {
-            "source": self.source.keys(),
-            "plotter": self.plotter,
-            "plotter_params": self.plotter_params,
-        }
+        return {"fileset": self.fileset.identity(), "tag": self.tag}
 
 
 @register_artifact
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Plots(ArtifactBase):
     fileset: Fileset
     tag: str
 
     def keys(self) -> Mapping[str, Any]:
-        return {"fileset": self.fileset.keys(), "tag": self.tag}
+        return {"fileset": self.fileset.identity(), "tag": self.tag}
@@ -4,15 +4,24 @@ from __future__ import annotations
 import json
 import os
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import DefaultDict, Dict, List, Any, Optional, Set, Tuple
+import functools
 import importlib
 import inspect
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-import cloudpickle
-
-from .artifacts import Fileset, Chunking, ChunkAnalysis, MergedResult, Plots
+from .artifacts import Fileset, Chunking, ChunkAnalysis, MergedResult, Plots, chunk_analysis_group, thaw
 from .deps import Deps
+from .identity import canonicalize
 from .producers import producer
+from .storage import append_jsonl, dump_payload, load_payload, read_json, read_jsonl, write_json
+
+CHUNK_INDEX_NAME = "_index.jsonl"
+
+# (resolved path, mtime_ns) -> parsed filesets.json
+_FILESET_CACHE: Dict[Tuple[str, int], Dict[str, List[str]]] = {}
 
 
 def _load_fileset_source() -> Dict[str, List[str]]:
@@ -34,18 +43,34 @@ def _load_fileset_source() -> Dict[str, List[str]]:
         package_default = Path(__file__).with_name("filesets.json")
         p = cwd_default if cwd_default.exists() else package_default
 
-    if not p.exists():
+    try:
+        st = p.stat()
+    except FileNotFoundError:
         raise FileNotFoundError(
             f"Missing fileset source JSON: {p}. "
             f"Set COFFEA_FILESET_JSON or create filesets.json."
-        )
+        ) from None
+
+    key = (os.path.abspath(p), st.st_mtime_ns)
+    cached = _FILESET_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     with p.open() as f:
         data = json.load(f)
     if not isinstance(data, dict):
         raise TypeError("filesets.json must contain a JSON object mapping dataset keys to file lists")
+    _FILESET_CACHE[key] = data
     return data
 
 
+def clear_fileset_source_cache() -> None:
+    """
+    Drop cached fileset sources, forcing the next make_fileset to re-read from disk.
+    """
+    _FILESET_CACHE.clear()
+
+
 @producer(Fileset)
 def make_fileset(*, target: Fileset, deps, out: Path) -> None:
     """
@@ -64,7 +89,7 @@ def make_fileset(*, target: Fileset, deps, out: Path) -> None:
         "era": target.era,
         "files": files,
     }
-    out.write_text(json.dumps(payload, indent=2))
+    write_json(out, payload)
 
 
 @producer(Chunking)
@@ -72,8 +97,7 @@ def make_partition(*, target: Chunking, deps, out: Path) -> None:
     """
     Chunks a Fileset manifest into N parts and write partition manifest.
     """
-    fileset_path = deps.need(target.fileset)
-    fileset = json.loads(fileset_path.read_text())
+    fileset = deps.read_json(target.fileset)
 
     files = fileset["files"]
     n_parts = target.n_parts
@@ -82,22 +106,17 @@ def make_partition(*, target: Chunking, deps, out: Path) -> None:
     if not files:
         raise ValueError("Fileset has 0 files; nothing to partition")
 
-    # simple partitioning
-    parts = [[] for _ in range(n_parts)]
-    for i, f in enumerate(files):
-        parts[i % n_parts].append(f)
-
+    # simple partitioning: file i goes to part i % n_parts
     manifest = {
         "dataset": fileset["dataset"],
         "era": fileset["era"],
         "n_parts": n_parts,
         "parts": [
-            {"part": i, "files": part_files}
-            for i, part_files in enumerate(parts)
-            if part_files  # drop empty parts (useful if n_parts > n_files)
+            {"part": i, "files": files[i::n_parts]}
+            for i in range(min(n_parts, len(files)))  # drop empty parts (useful if n_parts > n_files)
         ],
     }
-    out.write_text(json.dumps(manifest, indent=2))
+    write_json(out, manifest, indent=False)
 
 def _fileset_from_list_payload(fileset_payload: Dict[str, Any], files: List[str]) -> Dict[str, Any]:
     return {
@@ -110,9 +129,11 @@ def _fileset_from_list_payload(fileset_payload: Dict[str, Any], files: List[str]
         }
     }
 
+@functools.lru_cache(maxsize=None)
 def _load_object(path: str) -> Any:
     """
-    Initiate an object
+    Initiate an object.
+    Memoized: `path` names an importable attribute, which doesn't change for the process lifetime.
     """
     if ":" in path:
         mod_name, attr = path.split(":", 1)
@@ -133,14 +154,65 @@ def _resolve_executor(executor: Optional[str], executor_params: Dict[str, Any]):
             f"Only executor='futures' is supported (got {executor!r})."
         )
 
+    return _futures_executor(int(executor_params.get("workers", 1)))
+
+
+@functools.lru_cache(maxsize=None)
+def _futures_executor(workers: int):
+    # keyed on `workers` only: the rest of executor_params (schema, metadata_cache, ...) is
+    # consumed by the Runner and is often unhashable
     from coffea.processor.executor import FuturesExecutor
 
-    workers = int(executor_params.get("workers", 1))
     try:
         return FuturesExecutor(workers=workers)
     except TypeError:
         return FuturesExecutor(max_workers=workers)
-    
+
+
+def _call_with_accepted_kwargs(fn: Any, params: Dict[str, Any]) -> Any:
+    """
+    Call `fn` with the subset of `params` its signature accepts (all of them if it takes **kwargs).
+    """
+    try:
+        sig = inspect.signature(fn)
+    except (TypeError, ValueError):
+        return fn(**params)
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in sig.parameters.values()):
+        return fn(**params)
+    return fn(**{k: v for k, v in params.items() if k in sig.parameters})
+
+
+# (processor path, canonical processor_params) -> processor instance, reused by every
+# ChunkAnalysis this worker runs with the same processor configuration
+_PROC_CACHE: Dict[Tuple[str, bytes], Any] = {}
+_PROC_CACHE_LOCK = threading.Lock()
+
+
+def _processor_instance(processor: Any, processor_params: Dict[str, Any]) -> Any:
+    from coffea.processor import ProcessorABC
+
+    def build() -> Any:
+        processor_obj = _load_object(processor) if isinstance(processor, str) else processor
+        if isinstance(processor_obj, ProcessorABC):
+            return processor_obj
+        if inspect.isclass(processor_obj) or callable(processor_obj):
+            return _call_with_accepted_kwargs(processor_obj, processor_params)
+        raise TypeError("processor must be a ProcessorABC instance, class, or factory")
+
+    if not isinstance(processor, str):
+        return build()
+    try:
+        key = (processor, canonicalize(processor_params))
+    except TypeError:
+        return build()
+
+    with _PROC_CACHE_LOCK:
+        instance = _PROC_CACHE.get(key)
+        if instance is None:
+            instance = _PROC_CACHE[key] = build()
+        return instance
+
+
 @producer(ChunkAnalysis)
 def make_chunk_analysis(*, target: ChunkAnalysis, deps: Deps, out: Path) -> None:
     """
@@ -158,27 +230,19 @@ def make_chunk_analysis(*, target: ChunkAnalysis, deps: Deps, out: Path) -> None
     """
     from coffea.nanoevents import NanoAODSchema
     from coffea.processor.executor import Runner
-    from coffea.processor import ProcessorABC
 
-    chunk_path = deps.need(target.chunk)
-    chunk_payload = json.loads(chunk_path.read_text())
+    chunk_payload = deps.read_json(target.chunk)
     files = chunk_payload.get("files", [])
     if not isinstance(files, list) or not files:
         raise ValueError("ChunkAnalysis requires Chunking with non-empty 'files'")
 
     fileset = _fileset_from_list_payload(chunk_payload, files)
-    processor_obj = _load_object(target.processor) if isinstance(target.processor, str) else target.processor
-    
-    if isinstance(processor_obj, ProcessorABC):
-        processor_instance = processor_obj
-    elif inspect.isclass(processor_obj) or callable(processor_obj):
-        processor_instance = _call_with_accepted_kwargs(processor_obj, target.processor_params)
-    else:
-        raise TypeError("processor must be a ProcessorABC instance, class, or factory")
+    # artifact fields are read-only; the processor and coffea get their own mutable copies
+    processor_instance = _processor_instance(target.processor, thaw(target.processor_params))
 
     executor_params = {
         "schema": NanoAODSchema,
-        **(target.executor_params or {}),
+        **thaw(target.executor_params or {}),
     }
     schema = executor_params.get("schema")
     if isinstance(schema, str):
@@ -203,42 +267,111 @@ def make_chunk_analysis(*, target: ChunkAnalysis, deps: Deps, out: Path) -> None
         output = output[0]
 
     payload_path = out.parent / "payload.pkl"
-    with payload_path.open("wb") as f:
-        cloudpickle.dump(output, f)
+    buffers_name = dump_payload(output, payload_path)
 
     summary = {"nevents": output.get("nevents")} if isinstance(output, dict) else {}
-    out.write_text(
-        json.dumps(
-            {
-                "payload": payload_path.name,
-                "summary": summary,
-                "chunk_files": files,
-                "parameters": target.keys(),
-            },
-            indent=2,
-        )
+    write_json(
+        out,
+        {
+            "payload": payload_path.name,
+            # out-of-band array data the payload needs (pickle protocol 5), read by load_payload
+            "buffers": buffers_name,
+            "summary": summary,
+            "chunk_files": files,
+            "parameters": target.keys(),
+        },
     )
 
+    # register the finished chunk so merges can find it without scanning the cache
+    cache_root = deps.cache_dir
+    fs = target.chunk.fileset
+    append_jsonl(
+        cache_root / "ChunkAnalysis" / CHUNK_INDEX_NAME,
+        {
+            "dataset": fs.dataset,
+            "era": fs.era,
+            "tag": target.tag,
+            "part": target.part,
+            "path": out.relative_to(cache_root).as_posix(),
+        },
+    )
+
+
+class _ChunkIndex:
+    """
+    In-memory view of one ChunkAnalysis/_index.jsonl, grouped by (dataset, era, tag).
+    The file is append-only, so refreshing only parses the lines added since the last read,
+    whether they came from this process or another one. If the file is replaced (e.g. the
+    cache was wiped and rebuilt in the same process) the view is rebuilt from the start.
+    """
+
+    def __init__(self, cache_root: Path):
+        self.cache_root = cache_root
+        self.path = cache_root / "ChunkAnalysis" / CHUNK_INDEX_NAME
+        self._reset(None)
+        self._lock = threading.Lock()
+
+    def _reset(self, file_id: Optional[Tuple[int, int]]) -> None:
+        self._file_id = file_id
+        self._offset = 0
+        self._seen: Set[str] = set()
+        self._by_key: DefaultDict[Tuple[str, str, Optional[str]], List[Path]] = defaultdict(list)
+
+    def get(self, dataset: str, era: str, tag: Optional[str]) -> List[Path]:
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset(None)
+                return []
+            file_id = (st.st_dev, st.st_ino)
+            if file_id != self._file_id or st.st_size < self._offset:
+                # a different (or truncated) file than the one the offset points into
+                self._reset(file_id)
+            entries, self._offset = read_jsonl(self.path, self._offset)
+            for entry in entries:
+                rel = entry.get("path")
+                if rel is None or rel in self._seen:
+                    continue
+                self._seen.add(rel)
+                key = (entry.get("dataset"), entry.get("era"), entry.get("tag"))
+                self._by_key[key].append(self.cache_root / rel)
+            return list(self._by_key.get((dataset, era, tag), ()))
+
+
+_CHUNK_INDEXES: Dict[str, _ChunkIndex] = {}
 
 
 def _scan_chunk_results(cache_root: Path, dataset: str, era: str, tag: str | None) -> List[Path]:
-    chunk_dir = cache_root / "ChunkAnalysis"
-    if not chunk_dir.exists():
-        return []
+    """
+    Look up ChunkAnalysis manifests for (dataset, era, tag) in the chunk index.
+    Only the index is parsed; the matching manifests are left for the caller to read.
+    """
+    index = _CHUNK_INDEXES.get(os.fspath(cache_root))
+    if index is None:
+        index = _CHUNK_INDEXES.setdefault(os.fspath(cache_root), _ChunkIndex(cache_root))
+    if not index.path.exists():
+        # cache written without an index (or the index was removed): the key is also encoded
+        # in the directory layout, ChunkAnalysis/<dataset>__<era>__<tag>/<identity>/payload.json
+        group_dir = cache_root / "ChunkAnalysis" / chunk_analysis_group(dataset, era, tag)
+        return sorted(group_dir.glob("*/payload.json"))
+    return [p for p in index.get(dataset, era, tag) if p.exists()]
+
+
+def _load_chunk_output(manifest_path: Path) -> Optional[Tuple[Dict[str, Any], Any]]:
+    """
+    Read a ChunkAnalysis manifest and its pickled output; None if the payload is missing.
+    """
+    manifest = read_json(manifest_path)
+    payload_name = manifest.get("payload", "payload.pkl")
+    payload_path = manifest_path.parent / payload_name
+    if not payload_path.exists():
+        return None
+    buffers_name = manifest.get("buffers")
+    if buffers_name and not (manifest_path.parent / buffers_name).exists():
+        return None
 
-    results: List[Path] = []
-    for result_path in chunk_dir.rglob("payload.json"):
-        try:
-            payload = json.loads(result_path.read_text())
-        except json.JSONDecodeError:
-            continue
-        if (
-            payload.get("dataset") == dataset
-            and payload.get("era") == era
-            and payload.get("tag") == tag
-        ):
-            results.append(payload)
-    return results
+    return manifest, load_payload(payload_path)
 
 
 @producer(MergedResult)
@@ -252,29 +385,28 @@ def make_merged_result(*, target: MergedResult, deps: Deps, out: Path) -> None:
       - merges outputs (accumulate-style) if possible
       - writes merged payload.pkl + merged manifest json
     """
-    fileset_path = deps.need(target.fileset)
-    fileset_payload = json.loads(fileset_path.read_text())
+    fileset_payload = deps.read_json(target.fileset)
 
     dataset = fileset_payload["dataset"]
     era = fileset_payload["era"]
     tag = getattr(target, "tag", None)
 
-    
-    cache_root = out.parents[2]
-    
+    cache_root = deps.cache_dir
     analysis_manifests = _scan_chunk_results(cache_root, dataset, era, tag)
 
+    loaded: List[Optional[Tuple[Dict[str, Any], Any]]] = []
+    if analysis_manifests:
+        # payload loads are I/O bound; map() keeps the manifest order so the merge stays deterministic
+        with ThreadPoolExecutor(max_workers=min(32, len(analysis_manifests))) as pool:
+            loaded = list(pool.map(_load_chunk_output, analysis_manifests))
+
     outputs: List[Any] = []
     used_parts: List[int] = []
-    for manifest_path in analysis_manifests:
-        manifest = json.loads(manifest_path.read_text())
-        payload_name = manifest.get("payload", "payload.pkl")
-        payload_path = manifest_path.parent / payload_name
-        if not payload_path.exists():
+    for item in loaded:
+        if item is None:
             continue
-
-        with payload_path.open("rb") as f:
-            outputs.append(cloudpickle.load(f))
+        manifest, output = item
+        outputs.append(output)
 
         if isinstance(manifest.get("part"), int):
             used_parts.append(manifest["part"])
@@ -288,24 +420,22 @@ def make_merged_result(*, target: MergedResult, deps: Deps, out: Path) -> None:
             merged_output = outputs
 
     merged_payload_path = out.parent / "payload.pkl"
-    with merged_payload_path.open("wb") as f:
-        cloudpickle.dump(merged_output, f)
-
-    out.write_text(
-        json.dumps(
-            {
-                "type": "MergedResult",
-                "dataset": dataset,
-                "era": era,
-                "tag": tag,
-                "n_parts": len(set(used_parts)) if used_parts else 0,
-                "parts": sorted(set(used_parts)) if used_parts else [],
-                "n_inputs": len(outputs),
-                "payload": merged_payload_path.name,
-                "parameters": target.keys(),
-            },
-            indent=2,
-        )
+    buffers_name = dump_payload(merged_output, merged_payload_path)
+
+    write_json(
+        out,
+        {
+            "type": "MergedResult",
+            "dataset": dataset,
+            "era": era,
+            "tag": tag,
+            "n_parts": len(set(used_parts)) if used_parts else 0,
+            "parts": sorted(set(used_parts)) if used_parts else [],
+            "n_inputs": len(outputs),
+            "payload": merged_payload_path.name,
+            "buffers": buffers_name,
+            "parameters": target.keys(),
+        },
     )
 
 @producer(Plots)
@@ -313,8 +443,7 @@ def make_plots(*, target: Plots, deps: Deps, out: Path) -> None:
     """
     Placeholder plots artifact that depends on MergedResult.
     """
-    merged_path = deps.need(MergedResult(fileset=target.fileset, tag=target.tag))
-    merged = json.loads(merged_path.read_text())
+    merged = deps.read_json(MergedResult(fileset=target.fileset, tag=target.tag))
     payload = {
         "dataset": merged["dataset"],
         "era": merged["era"],
@@ -323,4 +452,4 @@ def make_plots(*, target: Plots, deps: Deps, out: Path) -> None:
         "plots": [],
         "note": "Placeholder plot manifest.",
     }
-    out.write_text(json.dumps(payload, indent=2))
+    write_json(out, payload)
@@ -1,15 +1,45 @@
 from __future__ import annotations
+import os
 from pathlib import Path
-from typing import TypeVar
+from typing import Any, Dict, Tuple, TypeVar
 
 from .artifacts import Artifact
+from .storage import read_json
 
 A = TypeVar("A", bound=Artifact)
 
 class Deps:
     def __init__(self, executor: "Executor"):
         self._executor = executor
+        # identity -> materialized path, for artifacts already needed through this Deps
+        self._path_cache: Dict[str, Path] = {}
+        # (path, mtime_ns) -> parsed manifest, shared by sibling producers reading the same dependency
+        self._json_cache: Dict[Tuple[str, int], Any] = {}
+
+    @property
+    def cache_dir(self) -> Path:
+        return Path(self._executor.cache_dir)
 
     def need(self, art: A) -> Path:
         # build/cache dependency and return its path on disk
-        return self._executor.materialize(art)
\ No newline at end of file
+        ident = art.identity()
+        p = self._path_cache.get(ident)
+        if p is not None:
+            return p
+        p = self._executor.materialize(art)
+        self._path_cache[ident] = p
+        return p
+
+
+    def read_json(self, art: A) -> Any:
+        """
+        need() the artifact and return its parsed manifest.
+        The result is shared between callers and must not be mutated.
+        """
+        p = self.need(art)
+        key = (os.fspath(p), os.stat(p).st_mtime_ns)
+        data = self._json_cache.get(key)
+        if data is None:
+            data = read_json(p)
+            self._json_cache[key] = data
+        return data
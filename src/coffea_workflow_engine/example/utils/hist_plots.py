@@ -1,9 +1,23 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import matplotlib as mpl
+# file output only; also keeps figures safe to render in worker processes.
+# force: utils.plotting (or the caller) may already have imported pyplot
+mpl.use("Agg", force=True)
+mpl.rcParams.update({
+    # the stacked H_T / m_bjj histograms are long step paths: let Agg merge
+    # near-collinear segments and rasterize them in chunks
+    "path.simplify": True,
+    "path.simplify_threshold": 1.0,
+    "agg.path.chunksize": 10000,
+    # matplotlib's bundled font, so the first draw doesn't search the system fonts
+    "font.family": "DejaVu Sans",
+})
 import matplotlib.pyplot as plt
 import numpy as np
 from utils.plotting import set_style
@@ -13,25 +27,28 @@ import hist
 
 def _save_fig(fig: mpl.figure.Figure, out_path: Path) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(out_path, dpi=150, bbox_inches="tight")
+    # gallery previews: favour encode speed over file size (zlib level 1, no optimize pass,
+    # no Software text chunk)
+    fig.savefig(
+        out_path,
+        dpi=150,
+        bbox_inches="tight",
+        metadata={"Software": None},
+        pil_kwargs={"compress_level": 1, "optimize": False},
+    )
     plt.close(fig)
 
 
 def _write_index(index_path: Path, merged_path: str, entries: List[Tuple[str, Path]]) -> None:
     index_path.parent.mkdir(parents=True, exist_ok=True)
 
-    lines: List[str] = []
-    lines.append("# Plots\n")
-    lines.append(f"- merged: `{merged_path}`\n")
-    lines.append("\n## Gallery\n")
-
+    lines: List[str] = ["# Plots\n", f"- merged: `{merged_path}`\n", "\n## Gallery\n"]
     for title, p in entries:
-        rel = p.relative_to(index_path.parent)
-        lines.append(f"\n### {title}\n")
-        lines.append(f"![]({rel.as_posix()})\n")
-        lines.append(f"`{p.name}`\n")
+        rel = p.relative_to(index_path.parent).as_posix()
+        lines += (f"\n### {title}\n", f"![]({rel})\n", f"`{p.name}`\n")
 
-    index_path.write_text("\n".join(lines))
+    # encode once and hand the whole file to a single write
+    index_path.write_bytes("\n".join(lines).encode("utf-8"))
 
 
 def _get_hist_payload(payload: Any) -> Dict[str, Any]:
@@ -49,9 +66,18 @@ def _get_hist_payload(payload: Any) -> Dict[str, Any]:
 # ----------------------------
 # Plots (AGC example Inspecting the produced histograms)
 # ----------------------------
-def plot_region_stack_4j1b_nominal(all_histograms: Dict[str, Any], *, out_path: Path,) -> Path:
+def _rebinned_4j1b(all_histograms: Dict[str, Any]) -> Any:
+    # H_T above 120 GeV, merged pairwise; shared by the 4j1b plots
+    return all_histograms["hist_dict"]["4j1b"][120j::hist.rebin(2), :, :]
+
 
-    h = all_histograms["hist_dict"]["4j1b"][120j::hist.rebin(2), :, "nominal"]
+def plot_region_stack_4j1b_nominal(
+    all_histograms: Dict[str, Any], *, out_path: Path, precomputed_4j1b: Optional[Any] = None,
+) -> Path:
+    """precomputed_4j1b: the result of _rebinned_4j1b, if the caller already has it."""
+    if precomputed_4j1b is None:
+        precomputed_4j1b = _rebinned_4j1b(all_histograms)
+    h = precomputed_4j1b[:, :, "nominal"]
 
     fig = plt.figure()
     h.stack("process")[::-1].plot(stack=True, histtype="fill", linewidth=1, edgecolor="grey")
@@ -77,16 +103,26 @@ def plot_region_stack_4j2b_nominal(all_histograms: Dict[str, Any], *, out_path:
     return out_path
 
 
-def plot_btag_variations_4j1b_ttbar(all_histograms: Dict[str, Any],*,out_path: Path,) -> Path:
-    hreg = all_histograms["hist_dict"]["4j1b"]
+def plot_btag_variations_4j1b_ttbar(
+    all_histograms: Dict[str, Any], *, out_path: Path, precomputed_4j1b: Optional[Any] = None,
+) -> Path:
+    """precomputed_4j1b: the result of _rebinned_4j1b, if the caller already has it."""
+    if precomputed_4j1b is None:
+        precomputed_4j1b = _rebinned_4j1b(all_histograms)
+    variations = {
+        "nominal": "nominal",
+        "btag_var_0_up": "NP 1",
+        "btag_var_1_up": "NP 2",
+        "btag_var_2_up": "NP 3",
+        "btag_var_3_up": "NP 4",
+    }
+    # select once, then pick each variation from the small sub-histogram
+    sub = precomputed_4j1b[:, "ttbar", list(variations)]
 
     fig = plt.figure()
 
-    hreg[120j::hist.rebin(2), "ttbar", "nominal"].plot(label="nominal", linewidth=2)
-    hreg[120j::hist.rebin(2), "ttbar", "btag_var_0_up"].plot(label="NP 1", linewidth=2)
-    hreg[120j::hist.rebin(2), "ttbar", "btag_var_1_up"].plot(label="NP 2", linewidth=2)
-    hreg[120j::hist.rebin(2), "ttbar", "btag_var_2_up"].plot(label="NP 3", linewidth=2)
-    hreg[120j::hist.rebin(2), "ttbar", "btag_var_3_up"].plot(label="NP 4", linewidth=2)
+    for name, label in variations.items():
+        sub[:, name].plot(label=label, linewidth=2)
 
     plt.legend(frameon=False)
     plt.xlabel(r"$H_T$ [GeV]")
@@ -99,12 +135,17 @@ def plot_btag_variations_4j1b_ttbar(all_histograms: Dict[str, Any],*,out_path: P
 def plot_jet_energy_variations_4j2b_ttbar(all_histograms: Dict[str, Any],*,out_path: Path,) -> Path:
 
     hreg = all_histograms["hist_dict"]["4j2b"]
+    variations = {
+        "nominal": "nominal",
+        "pt_scale_up": "scale up",
+        "pt_res_up": "resolution up",
+    }
+    sub = hreg[:, "ttbar", list(variations)]
 
     fig = plt.figure()
 
-    hreg[:, "ttbar", "nominal"].plot(label="nominal", linewidth=2)
-    hreg[:, "ttbar", "pt_scale_up"].plot(label="scale up", linewidth=2)
-    hreg[:, "ttbar", "pt_res_up"].plot(label="resolution up", linewidth=2)
+    for name, label in variations.items():
+        sub[:, name].plot(label=label, linewidth=2)
 
     plt.legend(frameon=False)
     plt.xlabel(r"$m_{bjj}$ [GeV]")
@@ -114,33 +155,94 @@ def plot_jet_energy_variations_4j2b_ttbar(all_histograms: Dict[str, Any],*,out_p
     return out_path
 
 
-def plot_ml_inference_grid(all_histograms: Dict[str, Any],*,feature_names: List[str],out_path: Path,) -> Path:
+ML_GRID_ROWS = 10
+ML_GRID_COLS = 2
+
 
+def _ml_grid_features(feature_names: List[str]) -> List[str]:
+    # keep the grid size fixed like the example: features past ROWS*COLS are not drawn
+    return feature_names[: ML_GRID_ROWS * ML_GRID_COLS]
+
+
+def _ml_tile_path(out_path: Path, i: int) -> Path:
+    return out_path.parent / f"{out_path.stem}_tiles" / f"{i:02d}.png"
+
+
+def plot_ml_inference_feature(all_histograms: Dict[str, Any], *, feature: str, out_path: Path) -> Path:
+    """One cell of the ML inference grid, as its own small figure."""
     ml_hist_dict = all_histograms.get("ml_hist_dict")
     if ml_hist_dict is None:
         raise KeyError("ml_hist_dict not present in merged payload")
 
-    n = len(feature_names)
-    nrows = 10
-    ncols = 2
-    fig, axs = plt.subplots(nrows, ncols, figsize=(14, 40))
+    fig, ax = plt.subplots(figsize=(7, 4))
+    h = ml_hist_dict[feature][:, :, "nominal"].stack("process").project("observable")
+    h.plot(stack=True, histtype="fill", linewidth=1, edgecolor="grey", ax=ax)
+    ax.legend(frameon=False)
+    ax.set_title(feature)
 
-    for i, feat in enumerate(feature_names):
-        col = 0 if i < 10 else 1
-        row = i if i < 10 else i - 10
-        if row >= nrows:
-            break  # keep the grid size fixed like the example
+    _save_fig(fig, out_path)
+    return out_path
 
-        ax = axs[row, col]
-        h = ml_hist_dict[feat][:, :, "nominal"].stack("process").project("observable")
-        h.plot(stack=True, histtype="fill", linewidth=1, edgecolor="grey", ax=ax)
-        ax.legend(frameon=False)
-        ax.set_title(feat)
 
-    _save_fig(fig, out_path)
+def _assemble_ml_grid(tiles: List[Path], out_path: Path) -> Path:
+    """
+    Paste the per-feature tiles into the 10x2 grid: features 0-9 fill the
+    first column, 10-19 the second.
+    """
+    from PIL import Image  # matplotlib already depends on Pillow
+
+    images = [Image.open(t).convert("RGB") for t in tiles]
+    cell_w = max((im.width for im in images), default=1)
+    cell_h = max((im.height for im in images), default=1)
+
+    grid = Image.new("RGB", (cell_w * ML_GRID_COLS, cell_h * ML_GRID_ROWS), "white")
+    for i, im in enumerate(images):
+        col, row = divmod(i, ML_GRID_ROWS)
+        grid.paste(im, (col * cell_w, row * cell_h))
+        im.close()
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    grid.save(out_path, compress_level=1)
     return out_path
 
 
+def plot_ml_inference_grid(
+    all_histograms: Dict[str, Any],
+    *,
+    feature_names: List[str],
+    out_path: Path,
+    max_workers: Optional[int] = 1,
+) -> Path:
+    """
+    Stacked nominal distributions of the ML inference variables in a 10x2 grid.
+    Each feature is rendered as a small figure (next to out_path, in <stem>_tiles/)
+    and the tiles are pasted into one image, instead of encoding a single
+    very large figure. max_workers > 1 renders the tiles in worker processes.
+    """
+    if all_histograms.get("ml_hist_dict") is None:
+        raise KeyError("ml_hist_dict not present in merged payload")
+
+    features = _ml_grid_features(feature_names)
+    tiles = [_ml_tile_path(out_path, i) for i in range(len(features))]
+    kwargs = [{"feature": f, "out_path": t} for f, t in zip(features, tiles)]
+
+    if max_workers is None or max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(_render_plot, plot_ml_inference_feature, all_histograms, kw) for kw in kwargs
+            ]
+            tiles = [f.result() for f in futures]
+    else:
+        tiles = [plot_ml_inference_feature(all_histograms, **kw) for kw in kwargs]
+
+    return _assemble_ml_grid(tiles, out_path)
+
+
+def _render_plot(fn: Callable[..., Path], histograms: Dict[str, Any], kwargs: Dict[str, Any]) -> Path:
+    # runs in a worker process: apply the style there too, it isn't inherited under spawn
+    set_style()
+    return fn(histograms, **kwargs)
+
 
 def make_all_agc_example_plots(
     *,
@@ -150,9 +252,12 @@ def make_all_agc_example_plots(
     plot_index: str | Path,
     use_inference: bool = False,
     feature_names: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
 ) -> Dict[str, Any]:
     """
     One entry point that produces all example plots and writes an index.md.
+    The plots are independent and rendered in parallel worker processes
+    (max_workers=1 renders them in this process).
     Returns a small summary dict.
     """
     all_histograms = _get_hist_payload(payload)
@@ -162,30 +267,57 @@ def make_all_agc_example_plots(
     plot_dir.mkdir(parents=True, exist_ok=True)
     plot_index.parent.mkdir(parents=True, exist_ok=True)
 
-    set_style()
-
-    entries: List[Tuple[str, Path]] = []
-
-    p1 = plot_region_stack_4j1b_nominal(all_histograms, out_path=plot_dir / "4j1b_nominal_stack.png")
-    entries.append(("≥ 4 jets, 1 b-tag (nominal stacked)", p1))
-
-    p2 = plot_region_stack_4j2b_nominal(all_histograms, out_path=plot_dir / "4j2b_nominal_stack.png")
-    entries.append(("≥ 4 jets, ≥ 2 b-tags (nominal stacked)", p2))
-
-    p3 = plot_btag_variations_4j1b_ttbar(all_histograms, out_path=plot_dir / "4j1b_ttbar_btag_variations.png")
-    entries.append(("4j1b ttbar: b-tagging variations", p3))
-
-    p4 = plot_jet_energy_variations_4j2b_ttbar(all_histograms, out_path=plot_dir / "4j2b_ttbar_jet_energy_variations.png")
-    entries.append(("4j2b ttbar: jet energy variations", p4))
-
+    def region(name: str) -> Dict[str, Any]:
+        # ship each worker only the histogram it plots, not the whole payload
+        return {"hist_dict": {name: all_histograms["hist_dict"][name]}}
+
+    # both 4j1b plots start from the same rebinned view: slice it once, and ship
+    # the (smaller) view to the workers instead of the full region histogram
+    h_4j1b_rebinned = _rebinned_4j1b(all_histograms)
+
+    # (gallery title, plot function, histograms it needs, kwargs)
+    jobs: List[Tuple[str, Callable[..., Path], Dict[str, Any], Dict[str, Any]]] = [
+        ("≥ 4 jets, 1 b-tag (nominal stacked)", plot_region_stack_4j1b_nominal,
+         {}, {"out_path": plot_dir / "4j1b_nominal_stack.png", "precomputed_4j1b": h_4j1b_rebinned}),
+        ("≥ 4 jets, ≥ 2 b-tags (nominal stacked)", plot_region_stack_4j2b_nominal,
+         region("4j2b"), {"out_path": plot_dir / "4j2b_nominal_stack.png"}),
+        ("4j1b ttbar: b-tagging variations", plot_btag_variations_4j1b_ttbar,
+         {}, {"out_path": plot_dir / "4j1b_ttbar_btag_variations.png", "precomputed_4j1b": h_4j1b_rebinned}),
+        ("4j2b ttbar: jet energy variations", plot_jet_energy_variations_4j2b_ttbar,
+         region("4j2b"), {"out_path": plot_dir / "4j2b_ttbar_jet_energy_variations.png"}),
+    ]
+
+    # the ML grid tiles go through the same pool as the other plots; the montage
+    # is assembled here once they are all written
+    ml_grid_path = plot_dir / "ml_inference_grid.png"
+    n_tiles = 0
     if use_inference:
         if not feature_names:
             raise ValueError("use_inference=True but feature_names is empty")
-        p5 = plot_ml_inference_grid(
-            all_histograms,
-            feature_names=feature_names,
-            out_path=plot_dir / "ml_inference_grid.png",
-        )
+        ml_hist_dict = all_histograms.get("ml_hist_dict")
+        if ml_hist_dict is None:
+            raise KeyError("ml_hist_dict not present in merged payload")
+        for i, feat in enumerate(_ml_grid_features(feature_names)):
+            jobs.append(
+                ("", plot_ml_inference_feature, {"ml_hist_dict": {feat: ml_hist_dict[feat]}},
+                 {"feature": feat, "out_path": _ml_tile_path(ml_grid_path, i)})
+            )
+            n_tiles += 1
+
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+
+    if max_workers <= 1:
+        paths = [_render_plot(fn, hists, kwargs) for _, fn, hists, kwargs in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_render_plot, fn, hists, kwargs) for _, fn, hists, kwargs in jobs]
+            paths = [f.result() for f in futures]
+
+    n_plots = len(jobs) - n_tiles
+    entries: List[Tuple[str, Path]] = [(title, p) for (title, *_), p in zip(jobs[:n_plots], paths)]
+    if use_inference:
+        p5 = _assemble_ml_grid(paths[n_plots:], ml_grid_path)
         entries.append(("ML inference variables (nominal stacked)", p5))
 
     _write_index(plot_index, merged_path, entries)
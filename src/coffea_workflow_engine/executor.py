@@ -1,4 +1,5 @@
 from __future__ import annotations
+import os
 from pathlib import Path
 from typing import Any, Type
 
@@ -9,25 +10,37 @@ from .deps import Deps
 class Executor:
     def __init__(self, cache_dir: Path):
         self.cache_dir = cache_dir
+        # path_for joins strings and builds a single Path per call
+        self._cache_str = os.fspath(cache_dir)
+        # shared by all producers run through this executor, so sibling producers
+        # needing the same dependency resolve it once
+        self._deps = Deps(self)
 
     def path_for(self, art: Artifact) -> Path:
-        return self.cache_dir / art.type_name / art.identity() / "payload.json"
+        # optional hook (ArtifactBase provides it); duck-typed artifacts may not
+        cache_group = getattr(art, "cache_group", None)
+        group = cache_group() if cache_group is not None else None
+        if group:
+            return Path(os.path.join(self._cache_str, art.type_name, group, art.identity(), "payload.json"))
+        return Path(os.path.join(self._cache_str, art.type_name, art.identity(), "payload.json"))
 
     def exists(self, art: Artifact) -> bool:
-        return self.path_for(art).exists()
+        return os.path.exists(self.path_for(art))
 
     def materialize(self, art: Artifact) -> Path:
         out = self.path_for(art)
-        if out.exists():
+        # cache hit is the common case on re-runs: one stat, no extra probe
+        try:
+            os.stat(out)
             return out
+        except FileNotFoundError:
+            pass
 
         out.parent.mkdir(parents=True, exist_ok=True)
         fn = get_producer(type(art))
-        deps = Deps(self)
+        fn(target=art, deps=self._deps, out=out)
 
-        fn(target=art, deps=deps, out=out)
-
-        if not out.exists():
+        if not os.path.exists(out):
             raise RuntimeError(
                 f"Producer for {art.type_name} finished but did not create output at {out}"
             )
@@ -2,36 +2,82 @@
 from __future__ import annotations
 import hashlib
 import json
+from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Dataclasses go through _default (to_dict) rather than orjson's native field dump, so it
+    # shares the stdlib's view of them. Non-str keys are left to the stdlib path (orjson raises
+    # on them): the two libraries order such keys differently.
+    _ORJSON_OPTS = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+def _default(o: Any) -> Any:
+    if hasattr(o, "to_dict"):
+        return o.to_dict()
+    if isinstance(o, Path):
+        return str(o)
+    raise TypeError(f"Not JSON serializable: {type(o)}")
+
+
+def _orjson_matches_stdlib(obj: Any) -> bool:
+    """
+    True only if obj is built from types both encoders handle the same way: str, int, bool,
+    None, finite floats outside exponent notation, dicts, lists/tuples, Paths and to_dict()
+    objects. orjson writes NaN/inf as null and exponent floats as 1e-7/1e16 (stdlib: NaN,
+    1e-07, 1e+16), and encodes datetime, date, UUID, Enum, ... natively where the stdlib
+    raises; all of those are left to the stdlib encoder.
+    """
+    t = type(obj)
+    if t is float:
+        # NaN fails both comparisons, inf the upper bound
+        return obj == 0.0 or 1e-4 <= abs(obj) < 1e16
+    if t is str or t is int or t is bool or obj is None:
+        return True
+    if isinstance(obj, dict):
+        return all(_orjson_matches_stdlib(v) for v in obj.values())
+    if t is list or t is tuple:
+        return all(_orjson_matches_stdlib(v) for v in obj)
+    if isinstance(obj, Path):
+        return True  # both go through _default
+    if hasattr(obj, "to_dict"):
+        return _orjson_matches_stdlib(obj.to_dict())
+    return False
+
 
 def canonicalize(obj: Any) -> bytes:
-    def default(o):
-        if hasattr(o, "to_dict"):
-            return o.to_dict()
-            
+    # identities must not depend on whether the optional orjson is installed: values it would
+    # encode differently go straight to the stdlib encoder
+    if orjson is not None and _orjson_matches_stdlib(obj):
         try:
-            from pathlib import Path
-            if isinstance(o, Path):
-                return str(o)
-        except Exception:
+            return orjson.dumps(obj, default=_default, option=_ORJSON_OPTS)
+        except orjson.JSONEncodeError:
+            # non-str keys, integers beyond 64 bits, ...; let the stdlib path decide
             pass
-        raise TypeError(f"Not JSON serializable: {type(o)}")
-
     return json.dumps(
         obj,
         sort_keys=True,
         separators=(",", ":"),
         ensure_ascii=False,
-        default=default,
+        default=_default,
     ).encode("utf-8")
 
+def _part_bytes(p: Any) -> bytes:
+    if isinstance(p, (bytes, bytearray)):
+        return bytes(p)
+    # artifacts (and anything else carrying pre-canonicalized bytes) skip re-serialization
+    canon = getattr(p, "_canon_bytes", None)
+    if isinstance(canon, bytes):
+        return canon
+    return canonicalize(p)
+
 def hash_identity(*parts: Any) -> str:
-    h = hashlib.sha256()
-    for p in parts:
-        if isinstance(p, (bytes, bytearray)):
-            h.update(p)
-        else:
-            h.update(canonicalize(p))
-        h.update(b"|")
-    return h.hexdigest()
+    # every part is followed by b"|"; the buffer is built first so the hash runs in a single update
+    buf = b"".join(_part_bytes(p) + b"|" for p in parts)
+    # 128-bit digest: plenty for cache keys and keeps cache directory names short
+    return hashlib.blake2b(buf, digest_size=16).hexdigest()
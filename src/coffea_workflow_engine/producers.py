@@ -17,7 +17,8 @@ def producer(return_type: Type[T]) -> Callable[[Callable[..., Any]], Callable[..
     return deco
 
 def get_producer(t: Type[T]) -> Callable[..., Any]:
-    try:
-        return _PRODUCERS[t]
-    except KeyError:
-        raise KeyError(f"No producer registered for artifact type: {t.__name__}")
\ No newline at end of file
+    # _PRODUCERS is already the per-type cache; the message is only built on a miss
+    fn = _PRODUCERS.get(t)
+    if fn is None:
+        raise KeyError(f"No producer registered for artifact type: {t.__name__}")
+    return fn
\ No newline at end of file
@@ -0,0 +1,250 @@
+from __future__ import annotations
+import atexit
+import io
+import json
+import os
+import pickle
+import struct
+import threading
+import types
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .identity import _orjson_matches_stdlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# orjson is only a faster path: anything it refuses (non-str keys, integers beyond 64 bits,
+# NaN written by the stdlib encoder, ...) goes through the stdlib json instead of failing.
+# Values it would silently write differently (NaN/inf as null, ...) skip it altogether.
+
+def dumps_json(obj: Any, *, indent: bool = False) -> bytes:
+    if orjson is not None and _orjson_matches_stdlib(obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+
+def loads_json(data: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def read_json(path: Path) -> Any:
+    return loads_json(path.read_bytes())
+
+
+@contextmanager
+def atomic_open(path: Path) -> Iterator[BinaryIO]:
+    """
+    Open a temporary sibling of `path` for binary writing and rename it over `path` on success.
+    Readers see either no file or the complete file, never a partial write.
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp.open("wb") as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    with atomic_open(path) as f:
+        f.write(data)
+
+
+def write_json(path: Path, obj: Any, *, indent: bool = True) -> None:
+    atomic_write_bytes(path, dumps_json(obj, indent=indent))
+
+
+# index lines up to this size are appended with a single unlocked write (see append_jsonl);
+# Linux's PIPE_BUF, spelled out because select.PIPE_BUF isn't available on every platform
+_ATOMIC_APPEND_MAX = 4096
+
+# absolute path -> O_APPEND fd, opened once per process (see append_jsonl)
+_APPEND_FDS: Dict[str, int] = {}
+_APPEND_FDS_LOCK = threading.Lock()
+
+
+def _append_fd(path: Path) -> int:
+    key = os.path.abspath(path)
+    with _APPEND_FDS_LOCK:
+        fd = _APPEND_FDS.get(key)
+        # reopen if the file was removed under us (e.g. the cache dir was wiped)
+        if fd is not None and os.fstat(fd).st_nlink == 0:
+            os.close(fd)
+            fd = None
+        if fd is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(key, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            _APPEND_FDS[key] = fd
+        return fd
+
+
+@atexit.register
+def _close_append_fds() -> None:
+    with _APPEND_FDS_LOCK:
+        for fd in _APPEND_FDS.values():
+            os.close(fd)
+        _APPEND_FDS.clear()
+
+
+def append_jsonl(path: Path, entry: Dict[str, Any]) -> None:
+    """
+    Append one JSON line to `path`.
+
+    Lines go out as a single write(2) on a per-process O_APPEND descriptor; appends of at most
+    _ATOMIC_APPEND_MAX bytes don't interleave between concurrent writers, so no lock is taken
+    for them.
+    Longer lines are written under an exclusive flock.
+    """
+    line = dumps_json(entry) + b"\n"
+    fd = _append_fd(path)
+    if len(line) <= _ATOMIC_APPEND_MAX:
+        os.write(fd, line)
+        return
+    import fcntl  # POSIX only; keeps the module (and the package) importable elsewhere
+
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        view = memoryview(line)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def read_jsonl(path: Path, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Read the complete lines of a JSON-lines file written by `append_jsonl`, starting at byte `offset`.
+    Returns the entries and the offset to continue from; a trailing partial line (a writer still
+    appending) is left for the next call. A missing file reads as empty.
+    """
+    try:
+        f = path.open("rb")
+    except FileNotFoundError:
+        return [], offset
+    with f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    entries: List[Dict[str, Any]] = []
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            entries.append(loads_json(line))
+        except ValueError:
+            # torn line left by an interrupted writer
+            continue
+    return entries, offset + end
+
+
+_BUFFERS_MAGIC = b"CWEBUF1\0"
+_BUFFERS_ALIGN = 64
+
+
+def _buffers_path(path: Path) -> Path:
+    return path.with_suffix(".buffers")
+
+
+def _aligned(n: int) -> int:
+    return -(-n // _BUFFERS_ALIGN) * _BUFFERS_ALIGN
+
+
+class _ByValue(pickle.PicklingError):
+    pass
+
+
+class _PayloadPickler(pickle.Pickler):
+    def reducer_override(self, obj: Any) -> Any:
+        # stdlib pickle stores classes and functions by reference; ones defined in __main__
+        # (scripts, notebooks) would then only load in the process that wrote them
+        owner = obj if isinstance(obj, (type, types.FunctionType)) else type(obj)
+        if getattr(owner, "__module__", None) == "__main__":
+            raise _ByValue(f"{owner!r} is defined in __main__")
+        return NotImplemented
+
+
+def dump_payload(obj: Any, path: Path) -> Optional[str]:
+    """
+    Pickle `obj` to `path` with protocol 5.
+
+    Stdlib pickle is tried first; objects it can't handle (lambdas, closures, anything
+    defined in __main__, ...) fall back to cloudpickle, which stores them by value.
+    Out-of-band buffers (e.g. numpy arrays) go to a `.buffers` sidecar instead of being
+    copied into the pickle stream; `load_payload` hands them back as views of one read.
+
+    Returns the sidecar's file name, or None when everything fit in the pickle itself.
+    The pickle can't be loaded without its sidecar, so callers record the name in their
+    manifest next to the payload.
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    try:
+        stream = io.BytesIO()
+        _PayloadPickler(stream, protocol=5, buffer_callback=buffers.append).dump(obj)
+        data = stream.getvalue()
+    except (pickle.PicklingError, AttributeError, TypeError):
+        import cloudpickle
+
+        buffers = []
+        data = cloudpickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+
+    sidecar = _buffers_path(path)
+    if buffers:
+        raws = [b.raw() for b in buffers]
+        header = _BUFFERS_MAGIC + struct.pack(f"<{len(raws) + 1}Q", len(raws), *(r.nbytes for r in raws))
+        with atomic_open(sidecar) as f:
+            f.write(header)
+            f.write(b"\0" * (_aligned(len(header)) - len(header)))
+            for r in raws:
+                f.write(r)
+                f.write(b"\0" * (_aligned(r.nbytes) - r.nbytes))
+    else:
+        sidecar.unlink(missing_ok=True)
+    atomic_write_bytes(path, data)
+    return sidecar.name if buffers else None
+
+
+def load_payload(path: Path) -> Any:
+    """
+    Load a payload written by `dump_payload` (or any plain pickle/cloudpickle file).
+    The sidecar is read once into a single buffer that the unpickled arrays then view
+    directly, so nothing is copied per array and no file stays open afterwards.
+    """
+    data = path.read_bytes()
+    try:
+        f = _buffers_path(path).open("rb")
+    except FileNotFoundError:
+        return pickle.loads(data)
+
+    with f:
+        blob = bytearray(os.fstat(f.fileno()).st_size)
+        f.readinto(blob)
+    if blob[: len(_BUFFERS_MAGIC)] != _BUFFERS_MAGIC:
+        raise ValueError(f"Corrupt payload buffers file: {_buffers_path(path)}")
+
+    offset = len(_BUFFERS_MAGIC)
+    (n,) = struct.unpack_from("<Q", blob, offset)
+    sizes = struct.unpack_from(f"<{n}Q", blob, offset + 8)
+    offset = _aligned(offset + 8 * (n + 1))
+
+    view = memoryview(blob)
+    buffers = []
+    for size in sizes:
+        buffers.append(view[offset: offset + size])
+        offset += _aligned(size)
+    return pickle.loads(data, buffers=buffers)
@@ -1,28 +1,31 @@
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, Iterable, List
 
 from ...artifacts import Artifact, artifact_from_dict
 from ...executor import Executor
 from ..config import Config
-from ..workflow import Workflow
+from ..workflow import Step, Workflow, _is_artifact_dict
 
 
 import coffea_workflow_engine.default_producers
 
 
 def _topo_order(num_steps: int, edges: Iterable[tuple[int, int]]) -> List[int]:
-    outgoing: Dict[int, List[int]] = {i: [] for i in range(num_steps)}
-    in_deg = {i: 0 for i in range(num_steps)}
+    # step indices are dense, so plain lists stand in for index-keyed dicts
+    outgoing: List[List[int]] = [[] for _ in range(num_steps)]
+    in_deg = [0] * num_steps
     for src, dst in edges:
         outgoing[src].append(dst)
         in_deg[dst] += 1
 
-    queue = [i for i in range(num_steps) if in_deg[i] == 0]
+    queue = deque(i for i in range(num_steps) if in_deg[i] == 0)
     order: List[int] = []
     while queue:
-        idx = queue.pop(0)
+        idx = queue.popleft()
         order.append(idx)
         for nxt in outgoing[idx]:
             in_deg[nxt] -= 1
@@ -34,23 +37,46 @@ def _topo_order(num_steps: int, edges: Iterable[tuple[int, int]]) -> List[int]:
     return order
 
 
+def _topo_layers(num_steps: int, edges: Iterable[tuple[int, int]]) -> List[List[int]]:
+    """
+    Group steps into layers: a step's layer is one past the deepest of its dependencies,
+    so the steps within a layer never depend on each other. Layers keep topological order.
+    """
+    edges = list(edges)
+    preds: List[List[int]] = [[] for _ in range(num_steps)]
+    for src, dst in edges:
+        preds[dst].append(src)
+
+    layer_of = [0] * num_steps
+    layers: List[List[int]] = []
+    for idx in _topo_order(num_steps, edges):
+        layer = max((layer_of[d] + 1 for d in preds[idx]), default=0)
+        layer_of[idx] = layer
+        if layer == len(layers):
+            layers.append([])
+        layers[layer].append(idx)
+    return layers
+
+
 def _resolve_params(
-    raw_params: Dict[str, Any],
+    step: Step,
     artifacts_by_name: Dict[str, Artifact],
 ) -> Dict[str, Any]:
-    resolved: Dict[str, Any] = {}
-    for key, value in raw_params.items():
+    if not step._ref_keys:
+        # nothing to resolve; params are only unpacked into the constructor
+        return step.params
+
+    resolved = dict(step.params)
+    for key in step._ref_keys:
+        value = resolved.pop(key)
         target_key = key[:-4] if key.endswith("_ref") else key
 
-        if isinstance(value, dict) and "type" in value and ("key" in value or "keys" in value):
+        if _is_artifact_dict(value):
             resolved[target_key] = artifact_from_dict(value)
-            continue
-
-        if key.endswith("_ref") and isinstance(value, str) and value in artifacts_by_name:
+        elif key.endswith("_ref") and isinstance(value, str) and value in artifacts_by_name:
             resolved[target_key] = artifacts_by_name[value]
-            continue
-
-        resolved[target_key] = value
+        else:
+            resolved[target_key] = value
     return resolved
 
 
@@ -74,27 +100,48 @@ def _print_dag(workflow: Workflow) -> None:
 def render_local(workflow: Workflow, config: Config) -> Dict[str, Any]:
     cache_dir = Path(config.cache_dir)
     executor = Executor(cache_dir=cache_dir)
+    # engine_opts["max_workers"]: steps of the same layer materialized concurrently (default 1)
+    max_workers = int((config.engine_opts or {}).get("max_workers", 1))
 
     num_steps = len(workflow.steps)
     if num_steps == 0:
         return {"paths": {}, "artifacts": {}, "order": []}
 
     _print_dag(workflow)
-    order = _topo_order(num_steps, workflow.edges)
+    layers = _topo_layers(num_steps, workflow.edges)
     artifacts_by_name: Dict[str, Artifact] = {}
     paths_by_name: Dict[str, Path] = {}
 
-    for idx in order:
-        step = workflow.steps[idx]
-        params = _resolve_params(step.params, artifacts_by_name)
-        artifact = step.step_type(**params)
-        print(
-            f"Executing step '{step.name}': "
-            f"{artifact.type_name} params={artifact.keys()}"
-        )
-        path = executor.materialize(artifact)
-        print(f"  -> materialized at {path}")
-        artifacts_by_name[step.name] = artifact
-        paths_by_name[step.name] = path
-
+    pool = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+    try:
+        for layer in layers:
+            # artifacts are built here, in order: params may refer to earlier layers only
+            artifacts: List[Artifact] = []
+            for idx in layer:
+                step = workflow.steps[idx]
+                params = _resolve_params(step, artifacts_by_name)
+                artifact = step.step_type(**params)
+                print(
+                    f"Executing step '{step.name}': "
+                    f"{artifact.type_name} params={artifact.keys()}"
+                )
+                artifacts.append(artifact)
+
+            # outputs are content-addressed and written atomically, so concurrent
+            # producers within a layer cannot clobber each other
+            if pool is None or len(artifacts) == 1:
+                paths = [executor.materialize(a) for a in artifacts]
+            else:
+                paths = list(pool.map(executor.materialize, artifacts))
+
+            for idx, artifact, path in zip(layer, artifacts, paths):
+                name = workflow.steps[idx].name
+                print(f"  -> '{name}' materialized at {path}")
+                artifacts_by_name[name] = artifact
+                paths_by_name[name] = path
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    order = [idx for layer in layers for idx in layer]
     return {"paths": paths_by_name, "artifacts": artifacts_by_name, "order": [workflow.steps[i].name for i in order]}
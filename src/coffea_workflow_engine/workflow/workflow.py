@@ -1,12 +1,26 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Sequence, Tuple, Type
+from typing import Any, Dict, FrozenSet, List, Sequence, Tuple, Type
+
+
+def _is_artifact_dict(value: Any) -> bool:
+    return isinstance(value, dict) and "type" in value and ("key" in value or "keys" in value)
+
 
 @dataclass(frozen=True)
 class Step:
     name: str
     step_type: Type 
     params: Dict[str, Any] = field(default_factory=dict)
+    # params keys the renderer has to resolve ("*_ref" names, serialized artifacts);
+    # computed once here so steps with plain params skip resolution entirely
+    _ref_keys: FrozenSet[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        ref_keys = frozenset(
+            k for k, v in self.params.items() if k.endswith("_ref") or _is_artifact_dict(v)
+        )
+        object.__setattr__(self, "_ref_keys", ref_keys)
 
     def to_dict(self) -> dict:
         return {"name": self.name, "step_type": self.step_type.__name__, "params": self.params}
@@ -15,11 +29,21 @@ class Step:
 class Workflow:
     steps: List[Step] = field(default_factory=list)
     edges: List[Tuple[int, int]] = field(default_factory=list)
+    # id(step) -> index in steps; avoids steps.index(), which deep-compares Step params
+    _index_by_id: Dict[int, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        for i, s in enumerate(self.steps):
+            self._index_by_id.setdefault(id(s), i)
 
     def add(self, step: Step, depends_on: Sequence[Step] = ()) -> Step:
         self.steps.append(step)
         step_idx = len(self.steps) - 1
-        dep_idxs = [self.steps.index(d) for d in depends_on]
+        self._index_by_id.setdefault(id(step), step_idx)
+        try:
+            dep_idxs = [self._index_by_id[id(d)] for d in depends_on]
+        except KeyError:
+            raise ValueError(f"Step '{step.name}' depends on a step that was not added to this workflow") from None
         for di in dep_idxs:
             self.edges.append((di, step_idx))
         return step
\ No newline at end of file
@@ -0,0 +1,35 @@
+import pickle
+
+import pytest
+
+from coffea_workflow_engine.artifacts import ChunkAnalysis, Chunking, Fileset, thaw
+
+
+def _analysis(processor_params):
+    chunking = Chunking(Fileset("TTbar", "2018"), 3)
+    return ChunkAnalysis(chunking, 0, 10_000, "demo", "processor:MyProcessor", processor_params=processor_params)
+
+
+def test_caller_mutation_does_not_leak_into_interned_artifact():
+    params = {"a": 1, "nested": {"cuts": [1, 2]}}
+    x = _analysis(params)
+    ident = x.identity()
+    params["a"] = 2
+    params["nested"]["cuts"].append(3)
+
+    y = _analysis({"a": 1, "nested": {"cuts": [1, 2]}})
+    assert y is x
+    assert thaw(y.processor_params) == {"a": 1, "nested": {"cuts": [1, 2]}}
+    assert x.identity() == ident
+
+
+def test_artifact_params_are_read_only():
+    x = _analysis({"a": 1})
+    with pytest.raises(TypeError):
+        x.processor_params["a"] = 2
+    assert _analysis({"a": 2}) is not x
+
+
+def test_frozen_params_roundtrip_pickle():
+    x = _analysis({"a": {"b": 1}})
+    assert pickle.loads(pickle.dumps(x)) == x
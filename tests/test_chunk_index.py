@@ -0,0 +1,27 @@
+import shutil
+
+from coffea_workflow_engine.default_producers import CHUNK_INDEX_NAME, _ChunkIndex
+from coffea_workflow_engine.storage import append_jsonl
+
+
+def _append(cache_root, part):
+    append_jsonl(
+        cache_root / "ChunkAnalysis" / CHUNK_INDEX_NAME,
+        {"dataset": "TTbar", "era": "2018", "tag": "demo", "part": part, "path": f"ChunkAnalysis/g/{part}/payload.json"},
+    )
+
+
+def test_index_rebuilt_after_cache_wipe(tmp_path):
+    cache_root = tmp_path / ".cache"
+    (cache_root / "ChunkAnalysis").mkdir(parents=True)
+    index = _ChunkIndex(cache_root)
+
+    for part in range(3):
+        _append(cache_root, part)
+    assert len(index.get("TTbar", "2018", "demo")) == 3
+
+    shutil.rmtree(cache_root)
+    (cache_root / "ChunkAnalysis").mkdir(parents=True)
+    _append(cache_root, 7)
+
+    assert index.get("TTbar", "2018", "demo") == [cache_root / "ChunkAnalysis/g/7/payload.json"]
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+
+from coffea_workflow_engine.artifacts import Artifact, Fileset, ChunkAnalysis, Chunking, chunk_analysis_group
+from coffea_workflow_engine.executor import Executor
+
+
+class DuckArtifact:
+    """Satisfies the Artifact protocol without subclassing ArtifactBase."""
+
+    type_name = "DuckArtifact"
+
+    def keys(self):
+        return {"x": 1}
+
+    def identity(self):
+        return "abc"
+
+    def to_dict(self):
+        return {"type": self.type_name, "keys": self.keys()}
+
+
+def test_duck_typed_artifact_is_stored_ungrouped(tmp_path):
+    art = DuckArtifact()
+    assert isinstance(art, Artifact)
+    assert Executor(tmp_path).path_for(art) == tmp_path / "DuckArtifact" / "abc" / "payload.json"
+
+
+def test_cache_group_inserts_directory_level(tmp_path):
+    fileset = Fileset("TTbar", "2018")
+    art = ChunkAnalysis(Chunking(fileset, 3), 0, 10_000, "demo", "processor:MyProcessor")
+    path = Executor(tmp_path).path_for(art)
+    assert path.parent.parent == tmp_path / "ChunkAnalysis" / chunk_analysis_group("TTbar", "2018", "demo")
+    assert path.parent.parent.name.startswith("TTbar__2018__demo-")
+    assert Executor(tmp_path).path_for(fileset) == tmp_path / "Fileset" / fileset.identity() / "payload.json"
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        (("ttbar__nominal", "2015", "t"), ("ttbar", "nominal__2015", "t")),
+        (("ttbar", "2015", "a/b"), ("ttbar", "2015", "a_b")),
+        (("ttbar", "2015", None), ("ttbar", "2015", "None")),
+    ],
+)
+def test_cache_groups_of_distinct_keys_differ(a, b):
+    assert chunk_analysis_group(*a) != chunk_analysis_group(*b)
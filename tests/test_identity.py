@@ -0,0 +1,49 @@
+import enum
+import math
+import uuid
+from datetime import date, datetime
+
+import pytest
+
+from coffea_workflow_engine import identity
+
+orjson = pytest.importorskip("orjson")
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        float("nan"),
+        float("inf"),
+        float("-inf"),
+        1e-7,
+        1e16,
+        0.1,
+        -0.0,
+        {"cut": float("nan"), "nested": [1e-7, {"x": 1e16}]},
+    ],
+)
+def test_canonicalize_same_bytes_with_and_without_orjson(monkeypatch, value):
+    with_orjson = identity.canonicalize(value)
+    monkeypatch.setattr(identity, "orjson", None)
+    assert identity.canonicalize(value) == with_orjson
+
+
+def test_nan_is_not_canonicalized_as_null():
+    assert identity.canonicalize({"cut": math.nan}) != identity.canonicalize({"cut": None})
+
+
+class Colour(enum.Enum):
+    RED = "red"
+
+
+@pytest.mark.parametrize(
+    "value",
+    [date(2020, 1, 1), datetime(2020, 1, 1, 12, 0), uuid.UUID(int=1), Colour.RED],
+)
+def test_types_only_orjson_encodes_are_rejected_either_way(monkeypatch, value):
+    with pytest.raises(TypeError):
+        identity.canonicalize({"d": value})
+    monkeypatch.setattr(identity, "orjson", None)
+    with pytest.raises(TypeError):
+        identity.canonicalize({"d": value})
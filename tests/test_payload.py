@@ -0,0 +1,62 @@
+import os
+import pickle
+
+from coffea_workflow_engine.storage import dump_payload, load_payload
+
+
+class Blob:
+    """Minimal stand-in for an array type that pickles its data out-of-band."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __reduce_ex__(self, protocol):
+        return (type(self)._rebuild, (pickle.PickleBuffer(self.data),))
+
+    @classmethod
+    def _rebuild(cls, buf):
+        return cls(buf)
+
+
+def test_sidecar_roundtrip(tmp_path):
+    path = tmp_path / "payload.pkl"
+    dump_payload({"a": Blob(bytearray(b"x" * 1000)), "n": 3}, path)
+    assert path.with_suffix(".buffers").exists()
+
+    out = load_payload(path)
+    assert out["n"] == 3
+    assert bytes(out["a"].data) == b"x" * 1000
+
+
+def test_loaded_payloads_hold_no_file_descriptors(tmp_path):
+    paths = []
+    for i in range(20):
+        path = tmp_path / f"{i}" / "payload.pkl"
+        path.parent.mkdir()
+        dump_payload(Blob(bytearray(b"y" * 100)), path)
+        paths.append(path)
+
+    before = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+    loaded = [load_payload(p) for p in paths]
+    if before is not None:
+        assert len(os.listdir("/proc/self/fd")) == before
+    assert all(bytes(b.data) == b"y" * 100 for b in loaded)
+
+
+def test_main_module_objects_are_stored_by_value(tmp_path):
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    src = str(Path(__file__).resolve().parents[1] / "src")
+    path = tmp_path / "payload.pkl"
+    writer = (
+        "from coffea_workflow_engine.storage import dump_payload\n"
+        "class Counts:\n"
+        "    def __init__(self, n): self.n = n\n"
+        f"dump_payload({{'c': Counts(5)}}, __import__('pathlib').Path({str(path)!r}))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": src}
+    subprocess.run([sys.executable, "-c", writer], check=True, env=env)
+
+    assert load_payload(path)["c"].n == 5
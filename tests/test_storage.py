@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from coffea_workflow_engine import storage
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_helpers_accept_the_same_documents(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(storage, "orjson", None)
+    elif storage.orjson is None:
+        pytest.skip("orjson not installed")
+
+    assert storage.loads_json(storage.dumps_json({"parameters": {1: "a"}})) == {"parameters": {"1": "a"}}
+    assert storage.loads_json(b'{"cut": NaN}')["cut"] != 0
+
+
+def test_write_then_read_json(tmp_path):
+    path = tmp_path / "payload.json"
+    storage.write_json(path, {"n": 1, "files": ["a.root"]})
+    assert storage.read_json(path) == {"n": 1, "files": ["a.root"]}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_non_finite_floats_survive_a_manifest_roundtrip(monkeypatch, tmp_path, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(storage, "orjson", None)
+    elif storage.orjson is None:
+        pytest.skip("orjson not installed")
+
+    path = tmp_path / "payload.json"
+    storage.write_json(path, {"summary": {"cut": float("nan"), "hi": float("inf"), "lo": float("-inf")}})
+    summary = storage.read_json(path)["summary"]
+    assert math.isnan(summary["cut"])
+    assert summary["hi"] == math.inf and summary["lo"] == -math.inf
+
+
+def test_append_jsonl_short_and_long_lines(tmp_path):
+    path = tmp_path / "_index.jsonl"
+    storage.append_jsonl(path, {"part": 0})
+    storage.append_jsonl(path, {"part": 1, "pad": "x" * 10_000})
+    entries, offset = storage.read_jsonl(path)
+    assert [e["part"] for e in entries] == [0, 1]
+    assert offset == path.stat().st_size